@@ -6,11 +6,32 @@ Streamlit-based GUI with password protection and Excel file upload functionality
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 import re
 import hashlib
 import json
 import io
-from typing import Dict, List, Tuple
+import os
+import bisect
+import ahocorasick
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:  # Fall back to pandas' default Excel engine
+    CalamineWorkbook = None
+
+# Patterns used when parsing items_ordered, compiled once at import
+_ITEM_QTY_SPLIT_RE = re.compile(r'(?s)^(.*)x([^x]*)$')
+_QTY_RE = re.compile(r'^(\d+)')
+_FOOD_SUFFIX_RE = re.compile(r'\d+个?[/／]?份?$')
+
+# Order sheet columns B:H, in sheet order
+ORDER_COLUMNS = ['delivery', 'customer', 'phone_number', 'address', 'city', 'zip_code', 'items_ordered']
+
+# Chinese characters, used to identify food item columns
+_CJK_RE = re.compile(r'[\u4e00-\u9fff]')
 
 def load_config():
     """Load configuration from Streamlit secrets or config.json file."""
@@ -74,124 +95,222 @@ def check_password():
         # Password correct.
         return True
 
-def load_food_items():
-    """Load the list of food items from food_items.csv"""
-    try:
-        food_df = pd.read_csv('food_items.csv')
-        return food_df['food_items'].tolist()
-    except FileNotFoundError:
-        st.error("food_items.csv not found! Please ensure the file exists.")
-        return []
-    except Exception as e:
-        st.error(f"Error loading food items: {str(e)}")
-        return []
+@st.cache_data(show_spinner=False, max_entries=1)
+def _read_food_items(path: str, mtime: float) -> List[str]:
+    """Read the food items list; the file's mtime is part of the cache key so edits reload it"""
+    food_df = pd.read_csv(path, engine='pyarrow')
+    return food_df['food_items'].tolist()
 
-def process_excel_to_csv(excel_file):
-    """
-    Process uploaded Excel file and convert it to the required CSV format
-    following the data processing steps from eda.ipynb
-    """
-    try:
-        # Read Excel file
-        df = pd.read_excel(excel_file, skiprows=3, usecols=[i for i in range(1, 8)])
-        
-        # Drop any rows that are completely empty
-        df = df.dropna(how='all')
-        
-        # Load food items list
-        food_items = load_food_items()
-        
-        if not food_items:
-            st.error("Could not load food items list")
-            return None
+def read_food_items() -> List[str]:
+    """Read food_items.csv, reusing the parsed list until the file changes"""
+    return _read_food_items('food_items.csv', os.path.getmtime('food_items.csv'))
+
+class FoodItemMatcher:
+    """Match item names from order text to the food items list"""
+    
+    def __init__(self, food_items: List[str]):
+        # Extract base names once by removing unit specifications. Matching on
+        # space-stripped names also covers the raw names, so only those are kept
+        self.food_table = []
+        for food_item in food_items:
+            base_name = _FOOD_SUFFIX_RE.sub('', food_item).strip()
+            self.food_table.append((food_item, base_name.replace(" ", "")))
+        base_names_normalized = [base_name_normalized for _, base_name_normalized in self.food_table]
         
-        # Rename columns to match expected format
-        column_mapping = {
-            df.columns[0]: 'delivery',
-            df.columns[1]: 'customer',
-            df.columns[2]: 'phone_number',
-            df.columns[3]: 'address',
-            df.columns[4]: 'city',
-            df.columns[5]: 'zip_code',
-            df.columns[6]: 'items_ordered'
-        }
+        # One automaton finds every base name contained in an item name in a single pass
+        self.automaton = ahocorasick.Automaton()
+        for index, base_name_normalized in enumerate(base_names_normalized):
+            if base_name_normalized and base_name_normalized not in self.automaton:
+                self.automaton.add_word(base_name_normalized, index)
+        if len(self.automaton):
+            self.automaton.make_automaton()
         
-        df = df.rename(columns=column_mapping)
+        # An empty base name is contained in every item name
+        self.empty_base_index = (base_names_normalized.index('') if '' in base_names_normalized
+                                 else len(self.food_table))
         
-        # Clean up the data - remove rows with no delivery or customer info
-        df = df.dropna(subset=['delivery', 'customer'])
+        # Base names joined into one string so a single find() locates the first
+        # base name containing an item name
+        self.base_names_joined = '\0'.join(base_names_normalized)
+        self.base_name_starts = []
+        position = 0
+        for base_name_normalized in base_names_normalized:
+            self.base_name_starts.append(position)
+            position += len(base_name_normalized) + 1
         
-        # Reset index after dropping rows
-        df = df.reset_index(drop=True)
+        # Index base names so exact hits skip the scan; entries are resolved with the
+        # same first-match scan so both paths agree on overlapping names
+        self.exact_map = {base_name_normalized: self._scan(base_name_normalized)
+                          for base_name_normalized in base_names_normalized}
+    
+    def _scan(self, item_name_normalized: str) -> Optional[str]:
+        """Return the first food item whose base name contains or is contained in the name"""
+        first = self.empty_base_index
+        if len(self.automaton):
+            for _, index in self.automaton.iter(item_name_normalized):
+                first = min(first, index)
+        position = self.base_names_joined.find(item_name_normalized)
+        if position != -1:
+            first = min(first, bisect.bisect_right(self.base_name_starts, position) - 1)
+        return self.food_table[first][0] if first < len(self.food_table) else None
+    
+    def match(self, item_names: pd.Series) -> pd.Series:
+        """Return the matching food item for each item name (NaN when none matches)"""
+        # Exact hits resolve straight from the index; only the remaining distinct
+        # names go through the scan
+        item_names = item_names.str.replace(" ", "", regex=False)
+        residual_names = item_names[~item_names.isin(self.exact_map.keys())].unique()
+        return item_names.map(
+            {**self.exact_map, **dict(zip(residual_names, map(self._scan, residual_names)))})
+
+@st.cache_resource(show_spinner=False)
+def _food_matcher_for(food_items: Tuple[str, ...]) -> FoodItemMatcher:
+    """Build the matcher once per food items list and share it across runs"""
+    return FoodItemMatcher(list(food_items))
+
+def _cell_text(value) -> Optional[str]:
+    """Render a calamine cell as the text pandas reads it as with dtype=str"""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, date):
+        return str(pd.Timestamp(value))
+    if isinstance(value, timedelta):
+        return str(pd.Timedelta(value))
+    return None if value == '' else str(value)
+
+def _read_order_sheet(excel_file) -> pd.DataFrame:
+    """Read columns B:H of the first sheet as text, below the title and header rows"""
+    if CalamineWorkbook is None:
+        with pd.ExcelFile(excel_file) as workbook:
+            return workbook.parse(workbook.sheet_names[0], skiprows=3, usecols='B:H',
+                                  names=ORDER_COLUMNS, dtype=str)
+    
+    with CalamineWorkbook.from_object(excel_file) as workbook:
+        sheet = workbook.get_sheet_by_index(0)
+        if sheet.start is None:
+            raise ValueError("The first sheet is empty")
         
-        # Add food item columns with zeros
-        for food_item in food_items:
-            df[food_item] = 0
+        # Rows are streamed from the top of the sheet, but each row starts at the
+        # first used column, so locate B:H relative to it
+        first_column = sheet.start[1]
+        padding = [None] * min(max(first_column - 1, 0), len(ORDER_COLUMNS))
+        begin, end = max(1 - first_column, 0), max(8 - first_column, 0)
         
-        # Parse items_ordered column to extract quantities
-        for idx, row in df.iterrows():
-            items_text = str(row['items_ordered'])
-            
-            # Skip empty rows
-            if pd.isna(items_text) or items_text == 'nan':
+        # Skip the three title rows and the header row (the first non-blank row
+        # after them), keeping only B:H of each order row
+        records = []
+        header_found = False
+        for row_number, row in enumerate(sheet.iter_rows()):
+            if row_number < 3:
                 continue
-            
-            # Split by Chinese comma and space separator "， "
-            items_list = items_text.split('， ')
-            
-            # Remove the last element (which contains total price)
-            if len(items_list) > 1:
-                items_list = items_list[:-1]
-            
-            # Process each item in the list
-            for item_entry in items_list:
-                item_entry = item_entry.strip()
-                if not item_entry:
-                    continue
-                
-                # Split by "x" to separate item name from quantity
-                if 'x' in item_entry:
-                    parts = item_entry.rsplit('x', 1)  # Split from right to handle multiple x's
-                    if len(parts) == 2:
-                        item_name_part = parts[0].strip()
-                        quantity_part = parts[1].strip()
-                        
-                        # Extract quantity (should be a number, possibly followed by comma or other chars)
-                        quantity_match = re.match(r'(\d+)', quantity_part)
-                        if quantity_match:
-                            quantity = int(quantity_match.group(1))
-                            
-                            # Find matching food item in our list
-                            for food_item in food_items:
-                                # Extract base name by removing unit specifications
-                                base_name = re.sub(r'\d+个?[/／]?份?$', '', food_item).strip()
-                                
-                                # Check if the item name matches the base name
-                                # First try exact match (with and without spaces)
-                                item_name_normalized = item_name_part.replace(" ", "")
-                                base_name_normalized = base_name.replace(" ", "")
-                                
-                                if (base_name in item_name_part or item_name_part in base_name or
-                                    base_name_normalized in item_name_normalized or
-                                    item_name_normalized in base_name_normalized):
-                                    df.at[idx, food_item] = quantity
-                                    break
-        
-        return df
-        
-    except Exception as e:
-        st.error(f"Error processing Excel file: {str(e)}")
-        return None
+            if not header_found:
+                header_found = any(cell != '' for cell in row)
+                continue
+            record = padding + [_cell_text(cell) for cell in row[begin:end]]
+            records.append(record + [None] * (len(ORDER_COLUMNS) - len(record)))
+    
+    if not header_found:
+        raise ValueError("No header row found in the first sheet")
+    return pd.DataFrame(records, columns=ORDER_COLUMNS, dtype=object)
+
+def process_excel_orders(excel_file, food_items: List[str]) -> pd.DataFrame:
+    """
+    Process uploaded Excel file into the order table, one quantity column per
+    food item, following the data processing steps from eda.ipynb; raises on failure
+    """
+    if not food_items:
+        raise ValueError("Could not load food items list")
+    
+    # Read the order columns of the first sheet
+    df = _read_order_sheet(excel_file)
+    
+    # Drop any rows that are completely empty
+    df = df.dropna(how='all')
+    
+    # Clean up the data - remove rows with no delivery or customer info
+    df = df.dropna(subset=['delivery', 'customer'])
+    
+    # Reset index after dropping rows
+    df = df.reset_index(drop=True)
+    
+    # Reuse the food item lookup structures built for this food items list
+    matcher = _food_matcher_for(tuple(food_items))
+
+    # Split by Chinese comma and space separator "， " into one row per item entry
+    entries = df['items_ordered'].fillna('').astype(str).str.split('， ').explode()
+
+    # Remove the last element of each order (which contains total price)
+    position = entries.groupby(level=0).cumcount()
+    entry_count = entries.groupby(level=0).transform('size')
+    entries = entries[(entry_count == 1) | (position < entry_count - 1)].str.strip()
+
+    # Split by the last "x" to separate item name from quantity
+    parts = entries.str.extract(_ITEM_QTY_SPLIT_RE)
+
+    # Extract quantity (should be a number, possibly followed by comma or other chars)
+    parsed = pd.DataFrame({
+        'item_name': parts[0].str.strip(),
+        'quantity': parts[1].str.strip().str.extract(_QTY_RE, expand=False)
+    }).dropna()
+
+    # Find matching food item in our list
+    parsed['food_item'] = matcher.match(parsed['item_name'])
+    parsed = parsed.dropna(subset=['food_item'])
+
+    # A repeated food item within an order keeps its last quantity
+    order_items = pd.MultiIndex.from_arrays([parsed.index, parsed['food_item']])
+    parsed = parsed[~order_items.duplicated(keep='last')]
+
+    # Convert the surviving quantities with Python int, which takes any digit run;
+    # they are stored as int16, so reject any that would overflow
+    item_quantities = parsed['quantity'].map(int)
+    if (item_quantities > np.iinfo(np.int16).max).any():
+        raise ValueError("item quantity exceeds the supported maximum of 32767")
+
+    # Write quantities into one contiguous matrix, one column per food item
+    food_to_col = {food_item: j for j, food_item in enumerate(food_items)}
+    quantities = np.zeros((len(df), len(food_items)), dtype=np.int16)
+    rows = parsed.index.to_numpy()
+    cols = parsed['food_item'].map(food_to_col).to_numpy(dtype=np.intp)
+    quantities[rows, cols] = item_quantities.to_numpy(dtype=np.int16)
+
+    df = pd.concat([df, pd.DataFrame(quantities, columns=food_items)], axis=1)
+
+    return df
+
+@st.cache_data(show_spinner=False, max_entries=1)
+def process_uploaded_excel(file_bytes: bytes, food_items: Tuple[str, ...]) -> pd.DataFrame:
+    """Process an uploaded Excel file, reusing the result for the same file and food items list"""
+    return process_excel_orders(io.BytesIO(file_bytes), list(food_items))
+
+@st.cache_data(show_spinner=False)
+def _food_columns_for(columns: Tuple[str, ...]) -> List[str]:
+    """Identify Chinese columns (food items) for a given column layout"""
+    # Skip first 7 non-food columns, then keep names containing Chinese characters
+    candidates = pd.Index(columns[7:], dtype=object)
+    return candidates[candidates.str.contains(_CJK_RE)].tolist()
+
+@st.cache_data(show_spinner=False, max_entries=1)
+def _read_saved_data(path: str, mtime: float) -> pd.DataFrame:
+    """Read processed orders; the file's mtime is part of the cache key so rewrites reload it"""
+    return pd.read_feather(path)
+
+@st.cache_data(show_spinner=False, max_entries=1)
+def _saved_data_csv(path: str, mtime: float) -> str:
+    """Render processed orders as CSV for download, once per saved file"""
+    return _read_saved_data(path, mtime).to_csv(index=False)
 
 class DeliveryOrderAnalyzer:
     def __init__(self):
         self.df = None
         self.chinese_columns = []
+        self.food_matrix = None
+        self.item_counts = None
         
-    def load_data_from_csv(self):
-        """Load and process the CSV data"""
+    def load_saved_data(self):
+        """Load and process the saved Feather data"""
         try:
-            self.df = pd.read_csv('data.csv')
+            self.df = _read_saved_data('data.feather', os.path.getmtime('data.feather'))
             self._identify_chinese_columns()
             return True
             
@@ -210,190 +329,110 @@ class DeliveryOrderAnalyzer:
     def _identify_chinese_columns(self):
         """Identify Chinese columns (food items)"""
         if self.df is not None:
-            all_columns = self.df.columns.tolist()
-            self.chinese_columns = []
+            self.chinese_columns = _food_columns_for(tuple(self.df.columns))
             
-            for col in all_columns[7:]:  # Skip first 7 non-food columns
-                # Check if column name contains Chinese characters
-                if re.search(r'[\u4e00-\u9fff]', col):
-                    self.chinese_columns.append(col)
+            # Keep the food item quantities as one matrix and count non-zero items per order
+            self.food_matrix = self.df[self.chinese_columns].to_numpy(dtype=np.int16, na_value=0)
+            self.item_counts = (self.food_matrix > 0).sum(axis=1)
     
     def analyze_selected_orders(self, selected_indices: List[int]) -> Tuple[List[Tuple[str, int]], int]:
         """Analyze selected orders and return item totals"""
         if not selected_indices or self.df is None:
             return [], 0
         
-        # Filter dataframe to selected rows
-        selected_df = self.df.iloc[selected_indices]
-        
-        # Calculate totals for each food item
-        item_totals = {}
+        # Sum the selected rows of the food item matrix in one reduction
+        totals = self.food_matrix[selected_indices].sum(axis=0, dtype=np.int64)
         
-        for col in self.chinese_columns:
-            total = selected_df[col].sum()
-            if total > 0:  # Only include items with quantity > 0
-                item_totals[col] = total
-        
-        # Sort by quantity (descending)
-        sorted_items = sorted(item_totals.items(), key=lambda x: x[1], reverse=True)
-        total_items = sum(item_totals.values())
+        # Sort by quantity (descending, ties keep column order) and only
+        # include items with quantity > 0
+        order = np.argsort(-totals, kind='stable')
+        order = order[totals[order] > 0]
+        sorted_items = [(self.chinese_columns[i], int(totals[i])) for i in order]
+        total_items = int(totals[order].sum())
         
         return sorted_items, total_items
 
-def main():
-    # Check password first
-    if not check_password():
-        st.stop()
-    
-    st.set_page_config(
-        page_title="Delivery Order Analyzer",
-        page_icon="🚚",
-        layout="wide"
-    )
-    
-    # Add logout button in sidebar
-    with st.sidebar:
-        st.markdown("### 👤 Session")
-        if st.button("🚪 Logout"):
-            # Clear all session state
-            for key in list(st.session_state.keys()):
-                del st.session_state[key]
-            st.rerun()
-        
-        st.markdown("---")
-        st.markdown("### 📂 Data Management")
-        
-        # File upload section
-        uploaded_file = st.file_uploader(
-            "Upload Excel File",
-            type=['xlsx', 'xls'],
-            help="Upload your delivery order Excel file to process"
-        )
-        
-        if uploaded_file is not None:
-            if st.button("🔄 Process Excel File"):
-                with st.spinner("Processing Excel file..."):
-                    processed_df = process_excel_to_csv(uploaded_file)
-                    if processed_df is not None:
-                        # Save to CSV
-                        processed_df.to_csv('data.csv', index=False)
-                        st.success("Excel file processed and saved as data.csv!")
-                        st.session_state['data_uploaded'] = True
-                        st.session_state['data_updated'] = True
-                        st.rerun()
-        
-        st.markdown("---")
-        st.markdown("### ℹ️ About")
-        st.markdown("**Delivery Order Analyzer**")
-        st.markdown("Version 2.0 - Enhanced")
-        st.markdown("Secure access enabled")
-        st.markdown("Excel upload supported")
-    
-    st.title("🚚 Delivery Order Analyzer")
-    st.markdown("Upload Excel file or analyze existing delivery order data")
-    
-    # Initialize analyzer
-    analyzer = DeliveryOrderAnalyzer()
-    
-    # Check if data has been uploaded in this session
-    if 'data_uploaded' not in st.session_state:
-        st.session_state['data_uploaded'] = False
-    
-    # Only try to load data if it was uploaded in this session
-    data_loaded = False
-    if st.session_state.get('data_uploaded', False):
-        data_loaded = analyzer.load_data_from_csv()
-    
-    if not data_loaded:
-        st.warning("📋 No data loaded. Please upload an Excel file to get started.")
-        st.info("👆 Use the sidebar to upload your delivery order Excel file.")
-        
-        # Show upload instructions
-        st.markdown("### 📤 How to Upload:")
-        st.markdown("1. Click on 'Browse files' in the sidebar")
-        st.markdown("2. Select your Excel file (.xlsx or .xls)")
-        st.markdown("3. Click 'Process Excel File' to convert and load data")
-        st.markdown("4. Start analyzing your delivery orders!")
-        
-        st.stop()
-    
-    st.success(f"✅ Loaded {len(analyzer.df)} delivery orders with {len(analyzer.chinese_columns)} food items")
-    
+def reset_order_selection(order_count: int, selected: bool):
+    """Set every order's selection and start a fresh order table editor"""
+    st.session_state.order_mask = np.full(order_count, selected, dtype=bool)
+    st.session_state.order_editor_version = st.session_state.get('order_editor_version', 0) + 1
+
+@st.fragment
+def render_orders_and_analysis(analyzer: DeliveryOrderAnalyzer):
+    """Render the order list and analysis panel as one fragment"""
     # Create two columns
     col1, col2 = st.columns([1, 1])
     
     with col1:
         st.header("📋 Select Orders")
         
+        # Initialize session state for selections as a single boolean mask,
+        # clearing it if data was updated
+        if (st.session_state.get('data_updated', False) or
+                len(st.session_state.get('order_mask', [])) != len(analyzer.df)):
+            reset_order_selection(len(analyzer.df), False)
+            st.session_state['data_updated'] = False
+        
         # Add selection controls
         col1a, col1b, col1c = st.columns(3)
         with col1a:
             if st.button("Select All"):
-                st.session_state.selected_orders = list(range(len(analyzer.df)))
+                reset_order_selection(len(analyzer.df), True)
         with col1b:
             if st.button("Clear All"):
-                st.session_state.selected_orders = []
+                reset_order_selection(len(analyzer.df), False)
         with col1c:
             show_details = st.checkbox("Show Details", value=False)
         
-        # Initialize session state for selections
-        if 'selected_orders' not in st.session_state:
-            st.session_state.selected_orders = []
-        
-        # Clear selections if data was updated
-        if st.session_state.get('data_updated', False):
-            st.session_state.selected_orders = []
-            st.session_state['data_updated'] = False
+        # Display all orders in one editable table; only the Select column is editable
+        order_table = pd.DataFrame({
+            'Select': st.session_state.order_mask,
+            'Delivery': analyzer.df['delivery'],
+            'Customer': analyzer.df['customer'],
+            'City': analyzer.df['city'],
+            'Items': analyzer.item_counts,
+        })
+        edited_table = st.data_editor(
+            order_table,
+            key=f"order_editor_{st.session_state.order_editor_version}",
+            column_config={'Select': st.column_config.CheckboxColumn("Select")},
+            disabled=['Delivery', 'Customer', 'City', 'Items'],
+            hide_index=True,
+            use_container_width=True
+        )
         
-        # Create a container for the order list
-        order_container = st.container()
+        # Derive the selected order indices from the edited table once per rerun
+        selected_orders = np.flatnonzero(edited_table['Select'].to_numpy()).tolist()
         
-        with order_container:
-            # Display orders with checkboxes
-            for idx, row in analyzer.df.iterrows():
-                # Count non-zero items for this order
-                item_count = sum(1 for col in analyzer.chinese_columns 
-                               if pd.notna(row[col]) and row[col] > 0)
-                
-                # Create checkbox
-                order_key = f"order_{idx}"
-                is_selected = idx in st.session_state.selected_orders
-                
-                # Order display text
-                order_text = f"{row['delivery']} - {row['customer']} ({row['city']}) - {item_count} items"
-                
-                # Checkbox
-                selected = st.checkbox(order_text, value=is_selected, key=order_key)
-                
-                # Update session state
-                if selected and idx not in st.session_state.selected_orders:
-                    st.session_state.selected_orders.append(idx)
-                elif not selected and idx in st.session_state.selected_orders:
-                    st.session_state.selected_orders.remove(idx)
-                
-                # Show details if requested
-                if show_details and selected:
-                    with st.expander(f"Details for {row['customer']}", expanded=False):
-                        st.write(f"**Phone:** {row['phone_number']}")
-                        st.write(f"**Address:** {row['address']}, {row['city']} {row['zip_code']}")
-                        st.write(f"**Items Ordered:** {row['items_ordered']}")
+        # Show details if requested
+        if show_details:
+            order_columns = ['customer', 'phone_number', 'address', 'city', 'zip_code', 'items_ordered']
+            order_rows = analyzer.df[order_columns].iloc[selected_orders].itertuples(index=False, name=None)
+            for customer, phone_number, address, city, zip_code, items_ordered in order_rows:
+                with st.expander(f"Details for {customer}", expanded=False):
+                    st.write(f"**Phone:** {phone_number}")
+                    st.write(f"**Address:** {address}, {city} {zip_code}")
+                    st.write(f"**Items Ordered:** {items_ordered}")
     
     with col2:
         st.header("📊 Analysis Results")
         
         # Show selection count
-        selected_count = len(st.session_state.selected_orders)
+        selected_count = len(selected_orders)
         st.info(f"Selected: {selected_count} orders")
         
         if selected_count > 0:
             # Analyze button
             if st.button("🔍 Analyze Selected Orders", type="primary"):
                 # Perform analysis
-                sorted_items, total_items = analyzer.analyze_selected_orders(st.session_state.selected_orders)
+                sorted_items, total_items = analyzer.analyze_selected_orders(selected_orders)
                 
                 if sorted_items:
                     st.success(f"Analysis complete! Found {len(sorted_items)} unique items, {total_items} total items")
                     
+                    # One timestamp for the report and both download file names
+                    analysis_time = pd.Timestamp.now()
+                    
                     # Display results in tabs
                     tab1, tab2, tab3 = st.tabs(["📈 Summary", "📋 Item List", "📄 Detailed Report"])
                     
@@ -432,46 +471,152 @@ def main():
                         st.download_button(
                             label="📥 Download as CSV",
                             data=csv,
-                            file_name=f"delivery_analysis_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                            file_name=f"delivery_analysis_{analysis_time.strftime('%Y%m%d_%H%M%S')}.csv",
                             mime="text/csv"
                         )
                     
                     with tab3:
                         st.subheader("Detailed Report")
                         
+                        # Gather the selected orders' fields in one projection
+                        selected_rows = analyzer.df.iloc[selected_orders][['delivery', 'customer', 'city']]
+                        order_lines = "\n".join(
+                            f"• {delivery} - {customer} ({city})"
+                            for delivery, customer, city in selected_rows.itertuples(index=False, name=None)
+                        )
+                        item_lines = "\n".join(f"• {item_name}: {quantity}" for item_name, quantity in sorted_items)
+
                         # Generate detailed report
                         report = f"""
 **DELIVERY ORDER ANALYSIS REPORT**
 ================================
 
-**Analysis Date:** {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}
+**Analysis Date:** {analysis_time.strftime('%Y-%m-%d %H:%M:%S')}
 **Orders Analyzed:** {selected_count}
 **Unique Items Ordered:** {len(sorted_items)}
 **Total Items:** {total_items}
 
 **SELECTED ORDERS:**
-"""
-                        for idx in st.session_state.selected_orders:
-                            row = analyzer.df.iloc[idx]
-                            report += f"\n• {row['delivery']} - {row['customer']} ({row['city']})"
-                        
-                        report += f"\n\n**ITEM QUANTITIES:**"
-                        for item_name, quantity in sorted_items:
-                            report += f"\n• {item_name}: {quantity}"
-                        
+
+{order_lines}
+
+**ITEM QUANTITIES:**
+{item_lines}"""
+
                         st.text_area("Report", report, height=400)
                         
                         # Download report
                         st.download_button(
                             label="📥 Download Report",
                             data=report,
-                            file_name=f"delivery_report_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.txt",
+                            file_name=f"delivery_report_{analysis_time.strftime('%Y%m%d_%H%M%S')}.txt",
                             mime="text/plain"
                         )
                 else:
                     st.warning("No items found in selected orders.")
         else:
             st.info("Select some orders to analyze.")
+
+def main():
+    # Check password first
+    if not check_password():
+        st.stop()
+    
+    st.set_page_config(
+        page_title="Delivery Order Analyzer",
+        page_icon="🚚",
+        layout="wide"
+    )
+    
+    # Add logout button in sidebar
+    with st.sidebar:
+        st.markdown("### 👤 Session")
+        if st.button("🚪 Logout"):
+            # Clear all session state
+            for key in list(st.session_state.keys()):
+                del st.session_state[key]
+            st.rerun()
+        
+        st.markdown("---")
+        st.markdown("### 📂 Data Management")
+        
+        # File upload section
+        uploaded_file = st.file_uploader(
+            "Upload Excel File",
+            type=['xlsx', 'xls'],
+            help="Upload your delivery order Excel file to process"
+        )
+        
+        if uploaded_file is not None:
+            if st.button("🔄 Process Excel File"):
+                with st.spinner("Processing Excel file..."):
+                    # Failures raise out of the cached processing, so they are reported
+                    # here and a retry after a fix processes the file again
+                    try:
+                        processed_df = process_uploaded_excel(uploaded_file.getvalue(),
+                                                              tuple(read_food_items()))
+                    except FileNotFoundError:
+                        st.error("food_items.csv not found! Please ensure the file exists.")
+                        processed_df = None
+                    except Exception as e:
+                        st.error(f"Error processing Excel file: {str(e)}")
+                        processed_df = None
+                    
+                    if processed_df is not None:
+                        # Save as Feather, which keeps column dtypes and reads back quickly
+                        processed_df.to_feather('data.feather')
+                        st.success("Excel file processed and saved as data.feather!")
+                        st.session_state['data_uploaded'] = True
+                        st.session_state['data_updated'] = True
+                        st.rerun()
+        
+        st.markdown("---")
+        st.markdown("### ℹ️ About")
+        st.markdown("**Delivery Order Analyzer**")
+        st.markdown("Version 2.0 - Enhanced")
+        st.markdown("Secure access enabled")
+        st.markdown("Excel upload supported")
+    
+    st.title("🚚 Delivery Order Analyzer")
+    st.markdown("Upload Excel file or analyze existing delivery order data")
+    
+    # Initialize analyzer
+    analyzer = DeliveryOrderAnalyzer()
+    
+    # Check if data has been uploaded in this session
+    if 'data_uploaded' not in st.session_state:
+        st.session_state['data_uploaded'] = False
+    
+    # Only try to load data if it was uploaded in this session
+    data_loaded = False
+    if st.session_state.get('data_uploaded', False):
+        data_loaded = analyzer.load_saved_data()
+    
+    if not data_loaded:
+        st.warning("📋 No data loaded. Please upload an Excel file to get started.")
+        st.info("👆 Use the sidebar to upload your delivery order Excel file.")
+        
+        # Show upload instructions
+        st.markdown("### 📤 How to Upload:")
+        st.markdown("1. Click on 'Browse files' in the sidebar")
+        st.markdown("2. Select your Excel file (.xlsx or .xls)")
+        st.markdown("3. Click 'Process Excel File' to convert and load data")
+        st.markdown("4. Start analyzing your delivery orders!")
+        
+        st.stop()
+    
+    st.success(f"✅ Loaded {len(analyzer.df)} delivery orders with {len(analyzer.chinese_columns)} food items")
+    
+    # Processed orders are stored as Feather; offer them as CSV for use elsewhere
+    st.download_button(
+        label="📥 Download Processed Orders (CSV)",
+        data=_saved_data_csv('data.feather', os.path.getmtime('data.feather')),
+        file_name="delivery_orders.csv",
+        mime="text/csv"
+    )
+    
+    # Order selection and analysis rerun on their own when their widgets change
+    render_orders_and_analysis(analyzer)
     
     # Footer
     st.markdown("---")